@@ -1,35 +1,79 @@
+import asyncio
 import os
 import platform
 import subprocess
-import json
-import datetime
+import re
+import time
+from collections import OrderedDict
 
-import ollama
+import orjson
+from ollama import AsyncClient, ResponseError
 
 # Folder where all LinkedIn draft text files will be stored
 DRAFTS_DIR = "drafts"
 
+# Tool routing only picks one of five tools, so it runs on a small quantized
+# model built from ./Modelfile (which also holds its system prompt); post
+# writing keeps the full model.
+ROUTER_MODEL = "gdg-router"
+CONTENT_MODEL = "llama3.2"
+
+client = AsyncClient()
+
 
 # ---------- Utility functions for files ----------
 
+# Set once the drafts folder has been created, so later calls skip the stat.
+_drafts_ready = False
+
+
 def ensure_drafts_dir():
+    global _drafts_ready
+    if _drafts_ready:
+        return
     os.makedirs(DRAFTS_DIR, exist_ok=True)
+    _drafts_ready = True
+
+
+# Characters not allowed in a draft filename: anything but letters, digits,
+# "-", "_" and spaces.
+_UNSAFE_TITLE_RE = re.compile(r"[^\w\- ]+")
 
 
 def create_draft_file(title, content):
     """Create a .txt file with the LinkedIn post content and return its path."""
-    safe_title = "".join(
-        c for c in title if c.isalnum() or c in ("-", "_", " ")
-    ).strip()
+    safe_title = _UNSAFE_TITLE_RE.sub("", title).strip()
     if not safe_title:
         safe_title = "linkedin_post"
 
-    timestamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
-    filename = f"{safe_title.replace(' ', '_')}_{timestamp}.txt"
-    path = os.path.join(DRAFTS_DIR, filename)
+    t = time.localtime()
+    timestamp = (
+        f"{t.tm_year:04d}{t.tm_mon:02d}{t.tm_mday:02d}-"
+        f"{t.tm_hour:02d}{t.tm_min:02d}{t.tm_sec:02d}"
+    )
+    stem = f"{safe_title.replace(' ', '_')}_{timestamp}"
 
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(content)
+    # O_EXCL so drafts with the same title saved in the same second (e.g. a
+    # /commands batch) get a _2, _3, ... suffix instead of overwriting each other.
+    n = 1
+    while True:
+        filename = f"{stem}.txt" if n == 1 else f"{stem}_{n}.txt"
+        path = os.path.join(DRAFTS_DIR, filename)
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+            break
+        except FileExistsError:
+            n += 1
+
+    # Raw writes; the text/buffered IO layers add nothing for one small file.
+    # os.write may write less than asked (e.g. on a nearly full disk), so
+    # keep going until every byte is out.
+    data = memoryview(content.encode("utf-8"))
+    try:
+        while data:
+            data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
 
     return path
 
@@ -39,34 +83,97 @@ def open_file(path):
     system = platform.system()
     if system == "Windows":
         os.startfile(path)  # type: ignore[attr-defined]
-    elif system == "Darwin":
-        subprocess.Popen(["open", path])
-    else:
-        subprocess.Popen(["xdg-open", path])
+        return
+
+    opener = "open" if system == "Darwin" else "xdg-open"
+    # Python's own fds are non-inheritable, so close_fds=False is safe and skips
+    # closing every descriptor in the child. A new session keeps the editor
+    # alive when the server or terminal that launched it goes away.
+    subprocess.Popen(
+        [opener, path],
+        close_fds=False,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+# Last listing of the drafts folder, reused until the folder's mtime changes.
+_drafts_cache = {"mtime": -1, "files": []}
 
 
 def list_drafts():
     """Return list of .txt files in the drafts folder."""
     ensure_drafts_dir()
-    return [f for f in os.listdir(DRAFTS_DIR) if f.endswith(".txt")]
+    mtime = os.stat(DRAFTS_DIR).st_mtime_ns
+    if mtime != _drafts_cache["mtime"]:
+        with os.scandir(DRAFTS_DIR) as it:
+            _drafts_cache["files"] = [
+                e.name for e in it if e.is_file() and e.name.endswith(".txt")
+            ]
+        _drafts_cache["mtime"] = mtime
+    return _drafts_cache["files"]
+
+
+# ---------- Prompts ----------
+# Kept constant and first in every conversation: Ollama reuses the cached
+# prefix of a prompt only when it is byte-identical to the previous one, so
+# anything request-specific goes into the user message instead.
+
+POST_SYSTEM_PROMPT = (
+    "You are an expert LinkedIn content writer. "
+    "Write engaging, professional posts with a clear hook, body, and call-to-action. "
+    "End with 4-7 relevant hashtags."
+)
+
+# JSON schema passed as `format` so Ollama can only sample valid tool calls.
+TOOL_CALL_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "tool": {
+            "type": "string",
+            "enum": ["create_post_file", "open_file", "list_files", "close_file", "none"],
+        },
+        "args": {"type": "object"},
+        "message": {"type": "string"},
+    },
+    "required": ["tool"],
+}
 
 
 # ---------- LLM helpers ----------
 
-def call_llm(messages, model="llama3.2"):
-    """Call the local Ollama model with a list of messages."""
-    response = ollama.chat(model=model, messages=messages)
-    return response["message"]["content"]
+async def preload_model(model=CONTENT_MODEL):
+    """
+    Load the model into memory ahead of the first command.
+    keep_alive=-1 tells Ollama to keep it loaded instead of unloading it when idle.
+    """
+    try:
+        await client.chat(
+            model=model,
+            messages=[{"role": "user", "content": "ok"}],
+            options={"num_predict": 1},
+            keep_alive=-1,
+        )
+    except (ResponseError, ConnectionError) as e:
+        print(f"Agent: Could not preload {model}: {e}")
 
 
-def generate_linkedin_post(title, topic_description):
-    """Ask the LLM to write a full LinkedIn post."""
-    system_msg = (
-        "You are an expert LinkedIn content writer. "
-        "Write engaging, professional posts with a clear hook, body, and call-to-action. "
-        "End with 4-7 relevant hashtags."
-    )
+async def call_llm(messages, model=CONTENT_MODEL, **chat_kwargs):
+    """
+    Call the local Ollama model and yield the reply token by token.
+    Extra keyword arguments (e.g. format) are passed on to client.chat.
+    """
+    # Each request resets the model's keep-alive, so every call repeats
+    # preload_model's keep_alive=-1 to keep the model loaded between commands.
+    chat_kwargs.setdefault("keep_alive", -1)
+    async for chunk in await client.chat(model=model, messages=messages, stream=True, **chat_kwargs):
+        yield chunk["message"]["content"]
+
 
+async def stream_linkedin_post(title, topic_description):
+    """Ask the LLM to write a full LinkedIn post, yielding tokens as they arrive."""
     user_msg = (
         f"Create a LinkedIn post.\n\n"
         f"Title or context: {title}\n"
@@ -74,118 +181,143 @@ def generate_linkedin_post(title, topic_description):
         f"Tone: professional, enthusiastic, concise."
     )
 
-    content = call_llm(
-        [
-            {"role": "system", "content": system_msg},
-            {"role": "user", "content": user_msg},
-        ]
-    )
-    return content.strip()
+    messages = [
+        {"role": "system", "content": POST_SYSTEM_PROMPT},
+        {"role": "user", "content": user_msg},
+    ]
+    async for token in call_llm(messages, model=CONTENT_MODEL):
+        yield token
+
+
+async def generate_linkedin_post(title, topic_description):
+    """Ask the LLM to write a full LinkedIn post and return it as one string."""
+    parts = [token async for token in stream_linkedin_post(title, topic_description)]
+    return "".join(parts).strip()
+
 
+# Obvious commands are routed by these patterns without asking the LLM.
+# Anything that needs a title or topic extracted still goes to the LLM.
+# Filenames are a single path component, so this shortcut can't reach outside drafts/.
+_OPEN_FILE_RE = re.compile(r"^\s*(?:please\s+)?open\s+(?:the\s+)?(?:draft\s+)?([^\s/\\]+\.txt)\s*$", re.I)
+# Whole-command forms only ("list all my drafts."), so a create request that
+# merely starts with "list" or "show" still reaches the LLM.
+_LIST_RE = re.compile(r"^\s*(?:please\s+)?(?:list|show)(?:\s+(?:me|all|my|the))*\s+drafts?\s*[.!]?\s*$", re.I)
+_OPEN_LAST_RE = re.compile(r"^\s*(?:please\s+)?open\b.*\b(?:last|latest)\b", re.I)
+_CLOSE_LAST_RE = re.compile(r"^\s*(?:please\s+)?close\b.*\b(?:last|latest)\b", re.I)
 
-def ask_agent_for_tool(user_command):
+
+def fast_route(user_command):
     """
-    Ask the agent which tool to use.
-    Agent must respond with strict JSON.
+    Route simple commands without the LLM.
+    Returns a tool call in the same shape as ask_agent_for_tool, or None.
+    The message is left empty: the tool's own output already tells the user
+    what happened.
     """
-    system_prompt = """
-You are a LinkedIn Draft Agent that can take high-level commands from the user
-and choose tools to act on their local machine.
-
-TOOLS YOU CAN CHOOSE:
-
-1) create_post_file(title, topic_description)
-   - Use when the user wants to create a new LinkedIn post draft.
-   - 'title': short title for the draft (string).
-   - 'topic_description': what the post should talk about (string).
-
-2) open_file(filename)
-   - Use when the user wants to open a specific draft file, or the last created file.
-   - 'filename': can be 'last' or an exact filename from the drafts folder.
-
-3) list_files()
-   - Use when the user wants to see all available draft files.
-
-4) close_file(filename)
-   - Conceptually closes a file. Since we cannot force-close the editor,
-     interpret this as telling the user to manually close it and forgetting
-     which file is 'last'.
-   - 'filename': can be 'last' or a specific filename.
-
-RESPONSE FORMAT (VERY IMPORTANT):
-You must ALWAYS respond only in VALID JSON (no extra text, no markdown, no commentary).
-
-Example responses:
-
-- To create a post:
-{
-  "tool": "create_post_file",
-  "args": {
-    "title": "Agentic AI Demo for College Students",
-    "topic_description": "Announcing my workshop and explaining what agentic AI means."
-  },
-  "message": "I'll create a new LinkedIn draft for your agentic AI workshop."
-}
+    # An explicit filename wins over "last", which may just be part of the name.
+    match = _OPEN_FILE_RE.search(user_command)
+    if match:
+        return {"tool": "open_file", "args": {"filename": match.group(1)}, "message": ""}
 
-- To open the last file:
-{
-  "tool": "open_file",
-  "args": {
-    "filename": "last"
-  },
-  "message": "Opening your last created LinkedIn draft."
-}
+    if _LIST_RE.search(user_command):
+        return {"tool": "list_files", "args": {}, "message": ""}
 
-- To list files:
-{
-  "tool": "list_files",
-  "args": {},
-  "message": "Here are all your saved LinkedIn drafts."
-}
+    if _OPEN_LAST_RE.search(user_command):
+        return {"tool": "open_file", "args": {"filename": "last"}, "message": ""}
 
-- To conceptually close the file:
-{
-  "tool": "close_file",
-  "args": {
-    "filename": "last"
-  },
-  "message": "I'll forget the last opened draft. Please close the editor window manually."
-}
+    if _CLOSE_LAST_RE.search(user_command):
+        return {"tool": "close_file", "args": {"filename": "last"}, "message": ""}
 
-- If no tool is needed and you just want to answer:
-{
-  "tool": "none",
-  "args": {},
-  "message": "Your plain text answer here."
-}
+    return None
 
-Do NOT write any explanation outside of the JSON.
-Only output a single JSON object.
-"""
 
-    content = call_llm(
-        [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_command},
-        ]
-    )
+# Tool decisions for recently seen commands, keyed by normalize_command().
+# create_post_file decisions carry a title/topic and are never cached, and
+# neither are decisions naming a specific file: the key is lowercased, so
+# "Report.txt" and "report.txt" would share an entry.
+ROUTE_CACHE_SIZE = 512
+_CACHEABLE_TOOLS = {"list_files", "open_file", "close_file", "none"}
+_route_cache = OrderedDict()
+
+_PUNCT_RE = re.compile(r"[^\w\s.\-]")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def _is_cacheable(tool_call):
+    if tool_call.get("tool") not in _CACHEABLE_TOOLS:
+        return False
+    args = tool_call.get("args") or {}
+    return args.get("filename", "last") == "last"
+
+
+def normalize_command(user_command):
+    """Lowercase, drop punctuation (keeping filename characters) and collapse whitespace."""
+    text = _PUNCT_RE.sub("", user_command.lower())
+    return _SPACE_RE.sub(" ", text).strip(" .")
+
+
+async def ask_agent_for_tool(user_command):
+    """
+    Ask the agent which tool to use.
+    Agent must respond with strict JSON.
+    Decisions for commands seen before are answered from _route_cache.
+    """
+    key = normalize_command(user_command)
+    if key in _route_cache:
+        _route_cache.move_to_end(key)
+        return _route_cache[key]
+
+    # The tool instructions are the router model's own system prompt (see
+    # Modelfile), so only the command itself is sent.
+    messages = [{"role": "user", "content": user_command}]
+    reply = call_llm(messages, model=ROUTER_MODEL, format=TOOL_CALL_SCHEMA)
+    content = "".join([token async for token in reply])
 
     try:
-        data = json.loads(content)
-    except json.JSONDecodeError:
-        # If the model messes up the JSON, fall back to a simple "none" tool.
-        data = {
+        data = orjson.loads(content)
+    except orjson.JSONDecodeError:
+        # Output is schema-constrained, but a reply cut off by the context
+        # limit can still be invalid; fall back to a simple "none" tool.
+        return {
             "tool": "none",
             "args": {},
             "message": f"(Agent output not valid JSON) Raw content: {content}",
         }
 
+    if _is_cacheable(data):
+        _route_cache[key] = data
+        if len(_route_cache) > ROUTE_CACHE_SIZE:
+            _route_cache.popitem(last=False)
+
     return data
 
 
 # ---------- Main event loop ----------
 
+async def preload_models():
+    await asyncio.gather(preload_model(ROUTER_MODEL), preload_model(CONTENT_MODEL))
+
+
+async def print_linkedin_post(title, topic_description):
+    """Stream a new post to the terminal as it is written and return its text."""
+    parts = []
+    async for token in stream_linkedin_post(title, topic_description):
+        parts.append(token)
+        print(token, end="", flush=True)
+    print("")
+    return "".join(parts).strip()
+
+
 def main():
+    # input() stays a plain blocking call so Ctrl-C interrupts it as usual;
+    # the LLM calls run on one event loop kept for the whole session.
+    loop = asyncio.new_event_loop()
+    try:
+        run_agent(loop)
+    finally:
+        loop.close()
+
+
+def run_agent(loop):
     ensure_drafts_dir()
     print("🔹 Local LinkedIn Draft Agent")
     print("Type a command, or 'exit' to quit.")
@@ -196,6 +328,11 @@ def main():
     print("  - Close the last draft.")
     print("")
 
+    # Load both models before the first prompt, so the first command doesn't
+    # pay for it and any preload warning is printed before "You:".
+    print("Agent: Loading models...")
+    loop.run_until_complete(preload_models())
+
     last_created_path = None
 
     while True:
@@ -204,8 +341,10 @@ def main():
             print("Agent: Goodbye!")
             break
 
-        print("Agent: Thinking which tool to use...")
-        tool_call = ask_agent_for_tool(user_command)
+        tool_call = fast_route(user_command)
+        if tool_call is None:
+            print("Agent: Thinking which tool to use...")
+            tool_call = loop.run_until_complete(ask_agent_for_tool(user_command))
 
         tool = tool_call.get("tool", "none")
         args = tool_call.get("args", {}) or {}
@@ -220,7 +359,7 @@ def main():
             topic_description = args.get("topic_description", user_command)
 
             print("Agent: Generating LinkedIn post content...")
-            post_text = generate_linkedin_post(title, topic_description)
+            post_text = loop.run_until_complete(print_linkedin_post(title, topic_description))
 
             path = create_draft_file(title, post_text)
             last_created_path = path
@@ -1,42 +1,125 @@
+import asyncio
 import os
 import platform
 import subprocess
-import json
-import datetime
-
-from flask import Flask, request, jsonify, render_template
-import ollama
+import re
+import time
+import uuid
+from urllib.parse import quote
+from collections import OrderedDict
+
+import orjson
+from ollama import AsyncClient, ResponseError
+from quart import (
+    Quart,
+    Response,
+    abort,
+    request,
+    jsonify,
+    render_template,
+    send_from_directory,
+    stream_with_context,
+)
+from quart.json.provider import DefaultJSONProvider
 
 # --------- Config ---------
 DRAFTS_DIR = "drafts"
-MODEL_NAME = "llama3.2"
+# Tool routing only picks one of five tools, so it runs on a small quantized
+# model built from ./Modelfile (which also holds its system prompt); post
+# writing keeps the full model.
+ROUTER_MODEL = "gdg-router"
+CONTENT_MODEL = "llama3.2"
+# When set to an nginx `internal` location that maps onto the drafts folder
+# (e.g. "/protected-drafts/"), GET /drafts/<name> only returns an
+# X-Accel-Redirect header and nginx sends the file itself.
+DRAFTS_ACCEL_PREFIX = os.environ.get("GDG_DRAFTS_ACCEL_PREFIX")
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Serve request/response JSON through orjson instead of the stdlib."""
+
+    def dumps(self, obj, **kwargs):
+        # orjson output is always compact and has no indent/separators options.
+        return orjson.dumps(obj, default=self.default).decode()
 
-app = Flask(__name__)
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
-# Keep track of last created file for "open last / close last"
-last_created_path = None
+
+app = Quart(__name__)
+app.json = OrjsonProvider(app)
+client = AsyncClient()
+
+# Last created/opened draft for "open last / close last". It lives in a file
+# rather than a global so every server worker sees the same value. The file
+# sits in a subfolder: replacing it there leaves the drafts folder's own mtime,
+# and with it the list_drafts cache, untouched.
+STATE_DIR = os.path.join(DRAFTS_DIR, ".state")
+LAST_PATH_FILE = os.path.join(STATE_DIR, "last")
+
+# Status files of background post-generation jobs, one <job id>.json each, so
+# GET /job/<id> works whichever worker started the job.
+JOBS_DIR = os.path.join(DRAFTS_DIR, ".jobs")
+# A running job rewrites its status file every this many tokens.
+JOB_FLUSH_TOKENS = 20
+# Job files untouched for this many seconds are deleted: finished jobs nobody
+# polled, and "running" jobs whose worker died.
+JOB_MAX_AGE = 60 * 60
 
 
 # ---------- Utility functions for files ----------
 
+# Set once the drafts folder has been created, so later calls skip the stat.
+_drafts_ready = False
+
+
 def ensure_drafts_dir():
+    global _drafts_ready
+    if _drafts_ready:
+        return
     os.makedirs(DRAFTS_DIR, exist_ok=True)
+    _drafts_ready = True
+
+
+# Characters not allowed in a draft filename: anything but letters, digits,
+# "-", "_" and spaces.
+_UNSAFE_TITLE_RE = re.compile(r"[^\w\- ]+")
 
 
 def create_draft_file(title, content):
     """Create a .txt file with the LinkedIn post content and return its path."""
-    safe_title = "".join(
-        c for c in title if c.isalnum() or c in ("-", "_", " ")
-    ).strip()
+    safe_title = _UNSAFE_TITLE_RE.sub("", title).strip()
     if not safe_title:
         safe_title = "linkedin_post"
 
-    timestamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
-    filename = f"{safe_title.replace(' ', '_')}_{timestamp}.txt"
-    path = os.path.join(DRAFTS_DIR, filename)
-
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(content)
+    t = time.localtime()
+    timestamp = (
+        f"{t.tm_year:04d}{t.tm_mon:02d}{t.tm_mday:02d}-"
+        f"{t.tm_hour:02d}{t.tm_min:02d}{t.tm_sec:02d}"
+    )
+    stem = f"{safe_title.replace(' ', '_')}_{timestamp}"
+
+    # O_EXCL so drafts with the same title saved in the same second (e.g. a
+    # /commands batch) get a _2, _3, ... suffix instead of overwriting each other.
+    n = 1
+    while True:
+        filename = f"{stem}.txt" if n == 1 else f"{stem}_{n}.txt"
+        path = os.path.join(DRAFTS_DIR, filename)
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+            break
+        except FileExistsError:
+            n += 1
+
+    # Raw writes; the text/buffered IO layers add nothing for one small file.
+    # os.write may write less than asked (e.g. on a nearly full disk), so
+    # keep going until every byte is out.
+    data = memoryview(content.encode("utf-8"))
+    try:
+        while data:
+            data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
 
     return path
 
@@ -46,34 +129,124 @@ def open_file(path):
     system = platform.system()
     if system == "Windows":
         os.startfile(path)  # type: ignore[attr-defined]
-    elif system == "Darwin":
-        subprocess.Popen(["open", path])
-    else:
-        subprocess.Popen(["xdg-open", path])
+        return
+
+    opener = "open" if system == "Darwin" else "xdg-open"
+    # Python's own fds are non-inheritable, so close_fds=False is safe and skips
+    # closing every descriptor in the child. A new session keeps the editor
+    # alive when the server or terminal that launched it goes away.
+    subprocess.Popen(
+        [opener, path],
+        close_fds=False,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def get_last():
+    """Return the path of the last created/opened draft, or None."""
+    try:
+        with open(LAST_PATH_FILE, encoding="utf-8") as f:
+            return f.read() or None
+    except FileNotFoundError:
+        return None
+
+
+def write_file_atomic(path, data):
+    """
+    Write bytes to path via a temp file and os.replace, so a reader in another
+    worker sees either the old or the new contents, never a half-written file.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def set_last(path):
+    """Remember path as the last draft; pass None to forget it."""
+    os.makedirs(STATE_DIR, exist_ok=True)
+    # An empty file means "nothing remembered".
+    write_file_atomic(LAST_PATH_FILE, (path or "").encode("utf-8"))
+
+
+# Last listing of the drafts folder, reused until the folder's mtime changes.
+_drafts_cache = {"mtime": -1, "files": []}
 
 
 def list_drafts():
     """Return list of .txt files in the drafts folder."""
     ensure_drafts_dir()
-    return [f for f in os.listdir(DRAFTS_DIR) if f.endswith(".txt")]
+    mtime = os.stat(DRAFTS_DIR).st_mtime_ns
+    if mtime != _drafts_cache["mtime"]:
+        with os.scandir(DRAFTS_DIR) as it:
+            _drafts_cache["files"] = [
+                e.name for e in it if e.is_file() and e.name.endswith(".txt")
+            ]
+        _drafts_cache["mtime"] = mtime
+    return _drafts_cache["files"]
+
+
+# ---------- Prompts ----------
+# Kept constant and first in every conversation: Ollama reuses the cached
+# prefix of a prompt only when it is byte-identical to the previous one, so
+# anything request-specific goes into the user message instead.
+
+POST_SYSTEM_PROMPT = (
+    "You are an expert LinkedIn content writer. "
+    "Write engaging, professional posts with a clear hook, body, and call-to-action. "
+    "End with 4-7 relevant hashtags."
+)
+
+# JSON schema passed as `format` so Ollama can only sample valid tool calls.
+TOOL_CALL_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "tool": {
+            "type": "string",
+            "enum": ["create_post_file", "open_file", "list_files", "close_file", "none"],
+        },
+        "args": {"type": "object"},
+        "message": {"type": "string"},
+    },
+    "required": ["tool"],
+}
 
 
 # ---------- LLM helpers ----------
 
-def call_llm(messages, model=MODEL_NAME):
-    """Call the local Ollama model with a list of messages."""
-    response = ollama.chat(model=model, messages=messages)
-    return response["message"]["content"]
+async def preload_model(model=CONTENT_MODEL):
+    """
+    Load the model into memory ahead of the first command.
+    keep_alive=-1 tells Ollama to keep it loaded instead of unloading it when idle.
+    """
+    try:
+        await client.chat(
+            model=model,
+            messages=[{"role": "user", "content": "ok"}],
+            options={"num_predict": 1},
+            keep_alive=-1,
+        )
+    except (ResponseError, ConnectionError) as e:
+        app.logger.warning("Could not preload %s: %s", model, e)
+
 
+async def call_llm(messages, model=CONTENT_MODEL, **chat_kwargs):
+    """
+    Call the local Ollama model and yield the reply token by token.
+    Extra keyword arguments (e.g. options, format) are passed on to client.chat.
+    """
+    # Each request resets the model's keep-alive, so every call repeats
+    # preload_model's keep_alive=-1 to keep the model loaded between commands.
+    chat_kwargs.setdefault("keep_alive", -1)
+    async for chunk in await client.chat(model=model, messages=messages, stream=True, **chat_kwargs):
+        yield chunk["message"]["content"]
 
-def generate_linkedin_post(title, topic_description):
-    """Ask the LLM to write a full LinkedIn post."""
-    system_msg = (
-        "You are an expert LinkedIn content writer. "
-        "Write engaging, professional posts with a clear hook, body, and call-to-action. "
-        "End with 4-7 relevant hashtags."
-    )
 
+async def stream_linkedin_post(title, topic_description):
+    """Ask the LLM to write a full LinkedIn post, yielding tokens as they arrive."""
     user_msg = (
         f"Create a LinkedIn post.\n\n"
         f"Title or context: {title}\n"
@@ -81,164 +254,431 @@ def generate_linkedin_post(title, topic_description):
         f"Tone: professional, enthusiastic, concise."
     )
 
-    content = call_llm(
-        [
-            {"role": "system", "content": system_msg},
-            {"role": "user", "content": user_msg},
-        ]
+    messages = [
+        {"role": "system", "content": POST_SYSTEM_PROMPT},
+        {"role": "user", "content": user_msg},
+    ]
+    async for token in call_llm(messages, model=CONTENT_MODEL):
+        yield token
+
+
+async def generate_linkedin_post(title, topic_description):
+    """Ask the LLM to write a full LinkedIn post and return it as one string."""
+    parts = [token async for token in stream_linkedin_post(title, topic_description)]
+    return "".join(parts).strip()
+
+
+async def generate_linkedin_posts_batch(jobs):
+    """
+    Write one LinkedIn post per (title, topic_description) job.
+    All requests are sent at once so Ollama can batch them together.
+    """
+    return await asyncio.gather(
+        *[generate_linkedin_post(title, topic_description) for title, topic_description in jobs]
     )
-    return content.strip()
 
 
-def ask_agent_for_tool(user_command):
+# Obvious commands are routed by these patterns without asking the LLM.
+# Anything that needs a title or topic extracted still goes to the LLM.
+# Filenames are a single path component, so this shortcut can't reach outside drafts/.
+_OPEN_FILE_RE = re.compile(r"^\s*(?:please\s+)?open\s+(?:the\s+)?(?:draft\s+)?([^\s/\\]+\.txt)\s*$", re.I)
+# Whole-command forms only ("list all my drafts."), so a create request that
+# merely starts with "list" or "show" still reaches the LLM.
+_LIST_RE = re.compile(r"^\s*(?:please\s+)?(?:list|show)(?:\s+(?:me|all|my|the))*\s+drafts?\s*[.!]?\s*$", re.I)
+_OPEN_LAST_RE = re.compile(r"^\s*(?:please\s+)?open\b.*\b(?:last|latest)\b", re.I)
+_CLOSE_LAST_RE = re.compile(r"^\s*(?:please\s+)?close\b.*\b(?:last|latest)\b", re.I)
+
+
+def fast_route(user_command):
     """
-    Ask the agent which tool to use.
-    Agent must respond with strict JSON.
+    Route simple commands without the LLM.
+    Returns a tool call in the same shape as ask_agent_for_tool, or None.
+    The message is left empty: the tool's own output already tells the user
+    what happened.
     """
-    system_prompt = """
-You are a LinkedIn Draft Agent that can take high-level commands from the user
-and choose tools to act on their local machine.
+    # An explicit filename wins over "last", which may just be part of the name.
+    match = _OPEN_FILE_RE.search(user_command)
+    if match:
+        return {"tool": "open_file", "args": {"filename": match.group(1)}, "message": ""}
 
-TOOLS YOU CAN CHOOSE:
+    if _LIST_RE.search(user_command):
+        return {"tool": "list_files", "args": {}, "message": ""}
 
-1) create_post_file(title, topic_description)
-   - Use when the user wants to create a new LinkedIn post draft.
-   - 'title': short title for the draft (string).
-   - 'topic_description': what the post should talk about (string).
+    if _OPEN_LAST_RE.search(user_command):
+        return {"tool": "open_file", "args": {"filename": "last"}, "message": ""}
 
-2) open_file(filename)
-   - Use when the user wants to open a specific draft file, or the last created file.
-   - 'filename': can be 'last' or an exact filename from the drafts folder.
+    if _CLOSE_LAST_RE.search(user_command):
+        return {"tool": "close_file", "args": {"filename": "last"}, "message": ""}
 
-3) list_files()
-   - Use when the user wants to see all available draft files.
+    return None
 
-4) close_file(filename)
-   - Conceptually closes a file. Since we cannot force-close the editor,
-     interpret this as telling the user to manually close it and forgetting
-     which file is 'last'.
-   - 'filename': can be 'last' or a specific filename.
 
-RESPONSE FORMAT (VERY IMPORTANT):
-You must ALWAYS respond only in VALID JSON (no extra text, no markdown, no commentary).
+# Tool decisions for recently seen commands, keyed by normalize_command().
+# create_post_file decisions carry a title/topic and are never cached, and
+# neither are decisions naming a specific file: the key is lowercased, so
+# "Report.txt" and "report.txt" would share an entry.
+ROUTE_CACHE_SIZE = 512
+_CACHEABLE_TOOLS = {"list_files", "open_file", "close_file", "none"}
+_route_cache = OrderedDict()
 
-If no tool is needed and you just want to answer:
-{
-  "tool": "none",
-  "args": {},
-  "message": "Your plain text answer here."
-}
+_PUNCT_RE = re.compile(r"[^\w\s.\-]")
+_SPACE_RE = re.compile(r"\s+")
 
-Only output a single JSON object.
-"""
 
-    content = call_llm(
-        [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_command},
-        ]
-    )
+def _is_cacheable(tool_call):
+    if tool_call.get("tool") not in _CACHEABLE_TOOLS:
+        return False
+    args = tool_call.get("args") or {}
+    return args.get("filename", "last") == "last"
+
+
+def normalize_command(user_command):
+    """Lowercase, drop punctuation (keeping filename characters) and collapse whitespace."""
+    text = _PUNCT_RE.sub("", user_command.lower())
+    return _SPACE_RE.sub(" ", text).strip(" .")
+
+
+async def ask_agent_for_tool(user_command):
+    """
+    Ask the agent which tool to use.
+    Agent must respond with strict JSON.
+    Decisions for commands seen before are answered from _route_cache.
+    """
+    key = normalize_command(user_command)
+    if key in _route_cache:
+        _route_cache.move_to_end(key)
+        return _route_cache[key]
+
+    # The tool instructions are the router model's own system prompt (see
+    # Modelfile), so only the command itself is sent.
+    messages = [{"role": "user", "content": user_command}]
+    reply = call_llm(messages, model=ROUTER_MODEL, format=TOOL_CALL_SCHEMA)
+    content = "".join([token async for token in reply])
 
     try:
-        data = json.loads(content)
-    except json.JSONDecodeError:
-        data = {
+        data = orjson.loads(content)
+    except orjson.JSONDecodeError:
+        # Output is schema-constrained, but a reply cut off by the context
+        # limit can still be invalid.
+        return {
             "tool": "none",
             "args": {},
             "message": f"(Agent output not valid JSON) Raw content: {content}",
         }
 
+    if _is_cacheable(data):
+        _route_cache[key] = data
+        if len(_route_cache) > ROUTE_CACHE_SIZE:
+            _route_cache.popitem(last=False)
+
     return data
 
 
-# ---------- Flask routes ----------
+# ---------- Background jobs ----------
 
-@app.route("/")
-def index():
-    return render_template("index.html")
+_JOB_ID_RE = re.compile(r"[0-9a-f]{32}")
 
 
-@app.route("/command", methods=["POST"])
-def handle_command():
-    global last_created_path
+def _job_path(job_id):
+    return os.path.join(JOBS_DIR, f"{job_id}.json")
 
-    data = request.get_json(force=True)
-    user_command = data.get("command", "").strip()
-    if not user_command:
-        return jsonify({"log": ["Agent: Please type a command."]})
 
-    log = []
-    log.append(f"You: {user_command}")
-    log.append("Agent: Thinking which tool to use...")
+def save_job(job_id, job):
+    """Write a job's status file; replaced atomically so pollers never see half of it."""
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    write_file_atomic(_job_path(job_id), orjson.dumps(job))
+
+
+def load_job(job_id):
+    """Return a job's status dict, or None if there is no such job."""
+    if not _JOB_ID_RE.fullmatch(job_id):
+        return None
+    try:
+        with open(_job_path(job_id), "rb") as f:
+            return orjson.loads(f.read())
+    except FileNotFoundError:
+        return None
+
+
+def delete_job(job_id):
+    try:
+        os.remove(_job_path(job_id))
+    except FileNotFoundError:
+        pass
+
+
+def sweep_jobs():
+    """Delete job files that haven't been written for JOB_MAX_AGE seconds."""
+    cutoff = time.time() - JOB_MAX_AGE
+    try:
+        with os.scandir(JOBS_DIR) as it:
+            for e in it:
+                if e.is_file() and e.stat().st_mtime < cutoff:
+                    try:
+                        os.remove(e.path)
+                    except FileNotFoundError:
+                        pass
+    except FileNotFoundError:
+        pass
 
-    tool_call = ask_agent_for_tool(user_command)
 
+async def generate_and_save(job_id, title, topic_description):
+    """Background job: write the post, save it as a draft and record progress."""
+    job = {"status": "running", "text": "", "log": []}
+    parts = []
+    try:
+        async for token in stream_linkedin_post(title, topic_description):
+            parts.append(token)
+            if len(parts) % JOB_FLUSH_TOKENS == 0:
+                job["text"] = "".join(parts)
+                save_job(job_id, job)
+
+        post_text = "".join(parts).strip()
+        ensure_drafts_dir()
+        path = create_draft_file(title, post_text)
+        set_last(path)
+    except asyncio.CancelledError:
+        # Server shutdown: tell the poller instead of leaving it "running".
+        job["status"] = "error"
+        job["log"] = ["Agent: The server stopped before the draft was finished."]
+        save_job(job_id, job)
+        raise
+    except Exception as e:
+        # Nobody awaits this task, so record the failure for the poller
+        # rather than leaving the job "running" forever.
+        app.logger.exception("Post job %s failed", job_id)
+        job["status"] = "error"
+        job["log"] = [f"Agent: Could not create the draft: {e}"]
+        save_job(job_id, job)
+        return
+
+    job["status"] = "done"
+    job["text"] = post_text
+    job["log"] = [
+        f"Agent: Draft created at: {path}",
+        "Agent: You can now ask me to open the last draft.",
+    ]
+    save_job(job_id, job)
+
+
+def start_post_job(title, topic_description):
+    """Start generating a post in the background and return its job id."""
+    sweep_jobs()
+    job_id = uuid.uuid4().hex
+    save_job(job_id, {"status": "running", "text": "", "log": []})
+    app.add_background_task(generate_and_save, job_id, title, topic_description)
+    return job_id
+
+
+# ---------- Command handling ----------
+
+async def run_tool(user_command, tool_call, post_text=None):
+    """
+    Carry out a tool call chosen by the agent, yielding ("log", line) and
+    ("job", job_id) events. create_post_file starts a background job unless
+    a post_text that was already generated is passed in.
+    """
     tool = tool_call.get("tool", "none")
     args = tool_call.get("args", {}) or {}
     message = tool_call.get("message", "")
 
     if message:
-        log.append(f"Agent: {message}")
+        yield "log", f"Agent: {message}"
 
     # ---- Handle tool calls ----
     if tool == "create_post_file":
         title = args.get("title", "LinkedIn Post")
         topic_description = args.get("topic_description", user_command)
 
-        log.append("Agent: Generating LinkedIn post content...")
-        post_text = generate_linkedin_post(title, topic_description)
-
-        ensure_drafts_dir()
-        path = create_draft_file(title, post_text)
-        last_created_path = path
+        if post_text is None:
+            # Don't hold the request open for the whole generation; the
+            # client polls GET /job/<id> for progress and the result.
+            job_id = start_post_job(title, topic_description)
+            yield "log", "Agent: Generating LinkedIn post content..."
+            yield "job", job_id
+        else:
+            ensure_drafts_dir()
+            path = create_draft_file(title, post_text)
+            set_last(path)
 
-        log.append(f"Agent: Draft created at: {path}")
-        log.append("Agent: You can now ask me to open the last draft.")
+            yield "log", f"Agent: Draft created at: {path}"
+            yield "log", "Agent: You can now ask me to open the last draft."
 
     elif tool == "open_file":
         filename = args.get("filename", "last")
 
         if filename == "last":
-            if last_created_path and os.path.exists(last_created_path):
-                open_file(last_created_path)
-                log.append(f"Agent: Opened last draft: {last_created_path}")
+            last_path = get_last()
+            if last_path and os.path.exists(last_path):
+                open_file(last_path)
+                yield "log", f"Agent: Opened last draft: {last_path}"
             else:
-                log.append("Agent: I don't have a 'last' draft remembered yet.")
+                yield "log", "Agent: I don't have a 'last' draft remembered yet."
         else:
             path = os.path.join(DRAFTS_DIR, filename)
             if os.path.exists(path):
                 open_file(path)
-                last_created_path = path
-                log.append(f"Agent: Opened draft: {path}")
+                set_last(path)
+                yield "log", f"Agent: Opened draft: {path}"
             else:
-                log.append(f"Agent: File '{filename}' not found in drafts folder.")
+                yield "log", f"Agent: File '{filename}' not found in drafts folder."
 
     elif tool == "list_files":
         files = list_drafts()
         if not files:
-            log.append("Agent: No drafts found yet.")
+            yield "log", "Agent: No drafts found yet."
         else:
-            log.append("Agent: Here are your drafts:")
+            yield "log", "Agent: Here are your drafts:"
             for f in files:
-                log.append(f"  - {f}")
+                yield "log", f"  - {f}"
 
     elif tool == "close_file":
         target = args.get("filename", "last")
-        if target == "last" and last_created_path:
-            log.append("Agent: I'll forget the last opened draft. Please close the editor window manually.")
-            last_created_path = None
+        if target == "last" and get_last():
+            yield "log", "Agent: I'll forget the last opened draft. Please close the editor window manually."
+            set_last(None)
         else:
-            log.append("Agent: I can't force-close the editor. Please close any open windows manually.")
+            yield "log", "Agent: I can't force-close the editor. Please close any open windows manually."
 
     elif tool == "none":
         # Just a text response; nothing to execute.
         pass
     else:
-        log.append(f"Agent: I don't recognize the tool '{tool}'. Doing nothing.")
+        yield "log", f"Agent: I don't recognize the tool '{tool}'. Doing nothing."
+
+
+async def route_command(user_command):
+    """Pick a tool call for the command, asking the LLM only when fast_route can't."""
+    tool_call = fast_route(user_command)
+    if tool_call is None:
+        tool_call = await ask_agent_for_tool(user_command)
+    return tool_call
+
+
+async def run_command(user_command):
+    """Route a single user command and carry it out, yielding log/job events."""
+    yield "log", f"You: {user_command}"
+
+    tool_call = fast_route(user_command)
+    if tool_call is None:
+        yield "log", "Agent: Thinking which tool to use..."
+        tool_call = await ask_agent_for_tool(user_command)
+
+    async for event in run_tool(user_command, tool_call):
+        yield event
+
+
+async def run_commands(user_commands):
+    """
+    Route and carry out several commands, returning one log per command.
+    Routing and post generation for all commands are sent to Ollama together.
+    """
+    tool_calls = await asyncio.gather(*[route_command(c) for c in user_commands])
+
+    jobs = []
+    for user_command, tool_call in zip(user_commands, tool_calls):
+        if tool_call.get("tool") == "create_post_file":
+            args = tool_call.get("args", {}) or {}
+            jobs.append(
+                (
+                    args.get("title", "LinkedIn Post"),
+                    args.get("topic_description", user_command),
+                )
+            )
+    post_texts = iter(await generate_linkedin_posts_batch(jobs))
+
+    results = []
+    for user_command, tool_call in zip(user_commands, tool_calls):
+        log = [f"You: {user_command}"]
+        post_text = next(post_texts) if tool_call.get("tool") == "create_post_file" else None
+        async for event, text in run_tool(user_command, tool_call, post_text):
+            if event == "log":
+                log.append(text)
+        results.append({"log": log})
+
+    return results
+
+
+# ---------- Quart routes ----------
+
+@app.before_serving
+async def warm_up():
+    ensure_drafts_dir()
+    # Don't hold up startup on loading the model.
+    app.add_background_task(preload_model, ROUTER_MODEL)
+    app.add_background_task(preload_model, CONTENT_MODEL)
+
+
+def sse(event, data):
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+
+
+@app.route("/")
+async def index():
+    return await render_template("index.html")
+
+
+@app.route("/drafts/<name>")
+async def serve_draft(name):
+    """Serve a draft file without reading it into Python first."""
+    if not name.endswith(".txt"):
+        abort(404)
+    if DRAFTS_ACCEL_PREFIX:
+        response = Response("", mimetype="text/plain")
+        response.headers["X-Accel-Redirect"] = DRAFTS_ACCEL_PREFIX + quote(name)
+        return response
+    return await send_from_directory(DRAFTS_DIR, name, as_attachment=False)
+
+
+@app.route("/command", methods=["POST"])
+async def handle_command():
+    data = await request.get_json(force=True)
+    user_command = data.get("command", "").strip()
+    if not user_command:
+        return jsonify({"log": ["Agent: Please type a command."]})
+
+    @stream_with_context
+    async def gen():
+        async for event, text in run_command(user_command):
+            yield sse(event, text)
+        yield sse("done", {})
+
+    response = Response(gen(), mimetype="text/event-stream")
+    # Routing on a model that is still loading can outlive Quart's default
+    # 60s response timeout.
+    response.timeout = None
+    return response
+
+
+@app.route("/job/<job_id>")
+async def job_status(job_id):
+    """
+    Report a post-generation job: {"status", "text", "log"}.
+    A finished job is reported once and then its file is deleted.
+    """
+    job = load_job(job_id)
+    if job is None:
+        abort(404)
+    if job["status"] != "running":
+        delete_job(job_id)
+    return jsonify(job)
+
+
+@app.route("/commands", methods=["POST"])
+async def handle_commands():
+    """Run a JSON list of commands and return a list of {"log": [...]} results."""
+    data = await request.get_json(force=True)
+    if not isinstance(data, list):
+        return jsonify({"error": "Expected a JSON list of commands."}), 400
+
+    user_commands = [str(c).strip() for c in data]
+    if not all(user_commands):
+        return jsonify({"error": "Commands must not be empty."}), 400
 
-    return jsonify({"log": log})
+    return jsonify(await run_commands(user_commands))
 
 
 if __name__ == "__main__":
     ensure_drafts_dir()
-    app.run(host="127.0.0.1", port=5000, debug=True)
+    app.run(host="127.0.0.1", port=5000)
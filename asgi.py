@@ -0,0 +1,6 @@
+# ASGI entry point for serving the web app with a production server, e.g.
+#
+#   hypercorn --workers 2 --bind 127.0.0.1:5000 asgi:app
+#
+# `python app.py` is still fine for local use.
+from app import app  # noqa: F401